@@ -2632,10 +2632,15 @@ class RestAPI:
 
         return api_response(OK_RESULT, status_code=HTTPStatus.OK)
 
-    def purge_evm_transaction_data(self, chain_id: Optional[SUPPORTED_CHAIN_IDS]) -> Response:
+    def purge_evm_transaction_data(
+            self,
+            chain_id: Optional[SUPPORTED_CHAIN_IDS],
+            vacuum: bool,
+    ) -> Response:
         chain = None if chain_id is None else chain_id.to_blockchain()
         DBEvmTx(self.rotkehlchen.data.db).purge_evm_transaction_data(
             chain=chain,  # type: ignore  # chain_id.to_blockchain() will only give supported chain
+            vacuum=vacuum,
         )
         return api_response(OK_RESULT, status_code=HTTPStatus.OK)
 
@@ -543,8 +543,8 @@ class EvmTransactionsResource(BaseMethodView):
 
     @require_loggedin_user()
     @use_kwargs(delete_schema, location='json')
-    def delete(self, evm_chain: Optional[SUPPORTED_CHAIN_IDS]) -> Response:
-        return self.rest_api.purge_evm_transaction_data(chain_id=evm_chain)
+    def delete(self, evm_chain: Optional[SUPPORTED_CHAIN_IDS], vacuum: bool) -> Response:
+        return self.rest_api.purge_evm_transaction_data(chain_id=evm_chain, vacuum=vacuum)
 
 
 class EvmPendingTransactionsDecodingResource(BaseMethodView):
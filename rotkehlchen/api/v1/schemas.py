@@ -246,6 +246,7 @@ class RequiredEvmAddressOptionalChainSchema(Schema):
 
 class EvmTransactionPurgingSchema(Schema):
     evm_chain = EvmChainNameField(required=False, load_default=None)
+    vacuum = fields.Boolean(load_default=False)
 
 
 class EvmTransactionQuerySchema(
@@ -38,6 +38,8 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
 
+RECEIPTS_WRITE_BATCH_SIZE = 100
+
 
 class EvmTransactions(metaclass=ABCMeta):  # noqa: B024
 
@@ -512,16 +514,13 @@ class EvmTransactions(metaclass=ABCMeta):  # noqa: B024
 
         transaction, raw_receipt_data = self.evm_inquirer.get_transaction_by_hash(tx_hash)
         with self.database.conn.write_ctx() as write_cursor:
-            self.dbevmtx.add_evm_transactions(
+            self.dbevmtx.add_evm_transactions_and_receipts(
                 write_cursor=write_cursor,
+                chain_id=self.evm_inquirer.chain_id,
                 evm_transactions=[transaction],
+                receipts_data=[raw_receipt_data],
                 relevant_address=relevant_address,
             )
-            self.dbevmtx.add_receipt_data(
-                write_cursor=write_cursor,
-                chain_id=self.evm_inquirer.chain_id,
-                data=raw_receipt_data,
-            )
 
         tx_data = cursor.execute(query, bindings).fetchone()
         tx_receipt = self.dbevmtx.get_receipt(cursor, tx_hash, self.evm_inquirer.chain_id)
@@ -671,24 +670,23 @@ class EvmTransactions(metaclass=ABCMeta):  # noqa: B024
             if len(hash_results) == 0:
                 return  # nothing to do
 
-            for entry in hash_results:
+            receipts_data = []
+            for idx, entry in enumerate(hash_results, start=1):
                 try:
-                    tx_receipt_data = self.evm_inquirer.get_transaction_receipt(tx_hash=entry)
+                    receipts_data.append(self.evm_inquirer.get_transaction_receipt(tx_hash=entry))
                 except RemoteError as e:
                     self.msg_aggregator.add_warning(f'Failed to query information for {self.evm_inquirer.chain_name} transaction {entry.hex()} due to {e!s}. Skipping...')  # noqa: E501
-                    continue
 
-                try:
+                # write in batches so that queried receipts are kept if we get interrupted
+                if len(receipts_data) == RECEIPTS_WRITE_BATCH_SIZE or idx == len(hash_results):
                     with self.database.user_write() as write_cursor:
-                        self.dbevmtx.add_receipt_data(
+                        self.dbevmtx.add_multiple_receipt_data(
                             write_cursor=write_cursor,
                             chain_id=self.evm_inquirer.chain_id,
-                            data=tx_receipt_data,
+                            data_list=receipts_data,
+                            skip_existing=True,  # receipts may be added by another greenlet
                         )
-                except sqlcipher.IntegrityError as e:  # pylint: disable=no-member
-                    if 'UNIQUE constraint failed: evmtx_receipts.tx_id' not in str(e):
-                        log.error(f'Failed to store transaction {entry.hex()} receipt due to {e!s}')  # noqa: E501
-                        raise  # if receipt is already added by other greenlet it's fine
+                    receipts_data = []
 
     def add_transaction_by_hash(
             self,
@@ -722,16 +720,13 @@ class EvmTransactions(metaclass=ABCMeta):  # noqa: B024
             raise InputError(f'Transaction data for {tx_hash.hex()} not found on chain.')
         transaction, receipt_data = tx_result
         with self.database.user_write() as write_cursor:
-            self.dbevmtx.add_evm_transactions(
+            self.dbevmtx.add_evm_transactions_and_receipts(
                 write_cursor=write_cursor,
+                chain_id=self.evm_inquirer.chain_id,
                 evm_transactions=[transaction],
+                receipts_data=[receipt_data],
                 relevant_address=associated_address,
             )
-            self.dbevmtx.add_receipt_data(
-                write_cursor=write_cursor,
-                chain_id=self.evm_inquirer.chain_id,
-                data=receipt_data,
-            )
         with self.dbevmtx.db.conn.read_ctx() as cursor:
             tx_receipt = self.dbevmtx.get_receipt(
                 cursor=cursor,
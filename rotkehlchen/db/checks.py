@@ -41,7 +41,10 @@ def sanity_check_impl(
         minimized_schema: dict[str, str],
 ) -> None:
     """The implementation of the DB sanity check. Out of DBConnection to keep things cleaner"""
-    cursor.execute('SELECT name, sql FROM sqlite_master WHERE type="table"')
+    # sqlite_stat tables hold the query planner statistics created by ANALYZE
+    cursor.execute(
+        'SELECT name, sql FROM sqlite_master WHERE type="table" AND name NOT LIKE "sqlite_stat%"',
+    )
     tables_data_from_db: dict[str, tuple[str, str]] = {}
     for (name, raw_script) in cursor:
         table_properties = re.findall(
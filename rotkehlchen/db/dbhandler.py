@@ -62,6 +62,7 @@ from rotkehlchen.db.loopring import DBLoopring
 from rotkehlchen.db.misc import detect_sqlcipher_version
 from rotkehlchen.db.schema import DB_SCRIPT_CREATE_TABLES
 from rotkehlchen.db.schema_transient import DB_SCRIPT_CREATE_TRANSIENT_TABLES
+from rotkehlchen.db.search_assets import casefolded_levenshtein
 from rotkehlchen.db.settings import (
     DEFAULT_PREMIUM_SHOULD_SYNC,
     ROTKEHLCHEN_DB_VERSION,
@@ -283,6 +284,7 @@ class DBHandler:
             - DB Upgrades
             - Create tables that are missing for new version
             - sanity checks
+            - Attach the global DB
 
         May raise:
         - AuthenticationError if a wrong password is given or if the DB is corrupt
@@ -323,6 +325,21 @@ class DBHandler:
             self.conn_transient.commit()
 
         self.conn.schema_sanity_check()
+        self._attach_globaldb()
+
+    def _attach_globaldb(self) -> None:
+        """Attach the global DB to the user DB connection as `globaldb` if not already attached
+
+        It stays attached for the lifetime of the connection so that queries that combine
+        data of both DBs don't need to attach and detach it every time.
+        """
+        with self.conn.critical_section():
+            if any(entry[1] == 'globaldb' for entry in self.conn.execute('PRAGMA database_list')):
+                return
+
+            self.conn.execute(
+                f'ATTACH DATABASE "{GlobalDBHandler().filepath()!s}" AS globaldb KEY "";',
+            )
 
     def get_md5hash(self, transient: bool = False) -> str:
         """Get the md5hash of the DB
@@ -433,11 +450,16 @@ class DBHandler:
             # If this goes away at any point it needs to be replaced by something
             # that checks the password is correct at this same point in the code
             conn.execute('PRAGMA cache_size = -32768')
+            # keep temporary tables and indices (sorting, staged deletes) out of disk files
+            conn.execute('PRAGMA temp_store = MEMORY')
         except sqlcipher.DatabaseError as e:  # pylint: disable=no-member
             raise AuthenticationError(
                 'Wrong password or invalid/corrupt database for user',
             ) from e
 
+        # used to rank the asset search results inside the DB query
+        conn.create_function('levenshtein', 2, casefolded_levenshtein)
+
         setattr(self, conn_attribute, conn)
 
     def _change_password(
@@ -479,6 +501,12 @@ class DBHandler:
     def disconnect(self, conn_attribute: Literal['conn', 'conn_transient'] = 'conn') -> None:
         conn = getattr(self, conn_attribute, None)
         if conn:
+            # let sqlite refresh the query planner statistics that it deems outdated. Only for
+            # the main schema so that nothing gets written to the attached global DB. The
+            # analysis limit keeps the ANALYZE that optimize may run cheap on big tables
+            with suppress(sqlcipher.DatabaseError):  # pylint: disable=no-member
+                conn.execute('PRAGMA analysis_limit=1000;')
+                conn.execute('PRAGMA main.optimize;')
             conn.close()
             setattr(self, conn_attribute, None)
 
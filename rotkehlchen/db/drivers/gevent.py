@@ -4,7 +4,7 @@ but heavily modified"""
 
 import random
 import sqlite3
-from collections.abc import Generator, Sequence
+from collections.abc import Callable, Generator, Sequence
 from contextlib import contextmanager
 from enum import Enum, auto
 from pathlib import Path
@@ -322,6 +322,10 @@ class DBConnection:
     def cursor(self) -> DBCursor:
         return DBCursor(connection=self, cursor=self._conn.cursor())
 
+    def create_function(self, name: str, num_params: int, func: Callable[..., Any]) -> None:
+        """Register a python function that can be called from SQL statements of this connection"""
+        self._conn.create_function(name, num_params, func)
+
     def close(self) -> None:
         self._conn.close()
         CONNECTION_MAP.pop(self.connection_type, None)
@@ -1,6 +1,9 @@
+import itertools
 import logging
 from typing import TYPE_CHECKING, Any, Optional, get_args
 
+from pysqlcipher3 import dbapi2 as sqlcipher
+
 from rotkehlchen.chain.arbitrum_one.constants import ARBITRUM_ONE_GENESIS
 from rotkehlchen.chain.base.constants import BASE_GENESIS
 from rotkehlchen.chain.ethereum.constants import ETHEREUM_GENESIS
@@ -44,6 +47,7 @@ TRANSACTIONS_MISSING_DECODING_QUERY = (
     'evmtx_receipts AS A LEFT OUTER JOIN evm_tx_mappings AS B ON A.tx_id=B.tx_id '
     'LEFT JOIN evm_transactions AS C on A.tx_id=C.identifier '
 )
+TRANSACTIONS_FETCH_BATCH_SIZE = 2048
 
 
 class DBEvmTx:
@@ -142,19 +146,14 @@ class DBEvmTx:
             'ON ITX.parent_tx=TX.identifier WHERE TX.tx_hash=? AND TX.chain_id=?',
             (parent_tx_hash, chain_id.serialize_for_db()),
         )
-        transactions = []
-        for result in results:
-            tx = EvmInternalTransaction(
-                parent_tx_hash=parent_tx_hash,
-                chain_id=chain_id,
-                trace_id=result[0],
-                from_address=result[1],
-                to_address=result[2],
-                value=result[3],
-            )
-            transactions.append(tx)
-
-        return transactions
+        return [EvmInternalTransaction(
+            parent_tx_hash=parent_tx_hash,
+            chain_id=chain_id,
+            trace_id=result[0],
+            from_address=result[1],
+            to_address=result[2],
+            value=result[3],
+        ) for result in results]
 
     def get_evm_transactions(
             self,
@@ -173,18 +172,20 @@ class DBEvmTx:
         query, bindings = self._form_evm_transaction_dbquery(query, bindings, has_premium)
         results = cursor.execute(query, bindings)
 
-        evm_transactions = []
-        for result in results:
-            try:
-                tx = self._build_evm_transaction(result)
-            except DeserializationError as e:
-                self.db.msg_aggregator.add_error(
-                    f'Error deserializing evm transaction from the DB. '
-                    f'Skipping it. Error was: {e!s}',
-                )
-                continue
-
-            evm_transactions.append(tx)
+        # bind the (possibly chain specific) builder once instead of per row
+        build_evm_transaction = self._build_evm_transaction
+        evm_transactions: list[EvmTransaction] = []
+        append = evm_transactions.append
+        # read rows in batches to not go through the cursor wrapper for every single row
+        while len(batch := results.fetchmany(TRANSACTIONS_FETCH_BATCH_SIZE)) != 0:
+            for result in batch:
+                try:
+                    append(build_evm_transaction(result))
+                except DeserializationError as e:
+                    self.db.msg_aggregator.add_error(
+                        f'Error deserializing evm transaction from the DB. '
+                        f'Skipping it. Error was: {e!s}',
+                    )
 
         return evm_transactions
 
@@ -204,8 +205,17 @@ class DBEvmTx:
         total_found_result = cursor.execute(query, bindings)
         return txs, total_found_result.fetchone()[0]  # always returns result
 
-    def purge_evm_transaction_data(self, chain: Optional[SUPPORTED_EVM_CHAINS]) -> None:
-        """Deletes all evm transaction related data from the DB"""
+    def purge_evm_transaction_data(
+            self,
+            chain: Optional[SUPPORTED_EVM_CHAINS],
+            vacuum: bool = False,
+    ) -> None:
+        """Deletes all evm transaction related data from the DB
+
+        If `vacuum` is True the DB file is rebuilt afterwards to reclaim the pages freed
+        by the deletion. This rewrites the whole DB so it's off by default. If the vacuum
+        fails the deletion is kept and a warning is shown to the user.
+        """
         query_ranges_tuples = []
         delete_query = 'DELETE FROM evm_transactions'
         delete_bindings = ()
@@ -229,6 +239,18 @@ class DBEvmTx:
             )
             cursor.execute(delete_query, delete_bindings)
 
+        if vacuum is True:  # can't run inside a transaction so wait for the delete to commit
+            try:
+                with self.db.conn.critical_section_and_transaction_lock():
+                    self.db.conn.execute('VACUUM;')
+            except sqlcipher.OperationalError as e:  # pylint: disable=no-member
+                # e.g. cannot VACUUM - SQL statements in progress. The data is already purged
+                log.error(f'Failed to vacuum the DB after purging evm transactions due to {e!s}')
+                self.db.msg_aggregator.add_warning(
+                    f'Purged the evm transactions but could not reclaim the freed space '
+                    f'of the DB due to {e!s}. Try again later.',
+                )
+
     def get_transaction_hashes_no_receipt(
             self,
             tx_filter_query: Optional[EvmTransactionsFilterQuery],
@@ -243,20 +265,17 @@ class DBEvmTx:
         else:
             querystr += ' WHERE '
 
-        querystr += 'evm_transactions.identifier NOT IN (SELECT tx_id from evmtx_receipts)'
+        # anti-join through the receipts primary key instead of NOT IN on the whole table
+        querystr += (
+            'NOT EXISTS (SELECT 1 FROM evmtx_receipts '
+            'WHERE evmtx_receipts.tx_id=evm_transactions.identifier) '
+        )
         if limit is not None:
             querystr += 'LIMIT ?'
             bindings = (*bindings, limit)  # type: ignore
 
-        cursor_result = cursor.execute(querystr, bindings)
-        hashes = []
-        for entry in cursor_result:
-            try:
-                hashes.append(deserialize_evm_tx_hash(entry[0]))
-            except DeserializationError as e:
-                log.debug(f'Got error {e!s} while deserializing tx_hash {entry[0]} from the DB')
-
-        return hashes
+        # tx_hash is stored as a blob so deserializing it can't fail
+        return [deserialize_evm_tx_hash(entry[0]) for entry in cursor.execute(querystr, bindings).fetchall()]  # noqa: E501
 
     def get_transaction_hashes_not_decoded(
             self,
@@ -322,52 +341,115 @@ class DBEvmTx:
         If the receipt already exists in the DB:
         pysqlcipher3.dbapi2.IntegrityError: UNIQUE constraint failed: evmtx_receipts.tx_hash
         """
-        tx_hash_b = hexstring_to_bytes(data['transactionHash'])
-        # some nodes miss the type field for older non EIP1559 transactions. So assume legacy (0)
-        tx_type = hexstr_to_int(data.get('type', '0x0'))
-        status = data.get('status', 1)  # status may be missing for older txs. Assume 1.
-        serialized_chain_id = chain_id.serialize_for_db()
-        if status is None:
-            status = 1
-
-        contract_address = deserialize_evm_address(data['contractAddress']) if data['contractAddress'] else None  # noqa: E501
-        tx_id = write_cursor.execute(
-            'SELECT identifier from evm_transactions WHERE tx_hash=? AND chain_id=?',
-            (tx_hash_b, serialized_chain_id),
-        ).fetchone()[0]
-        write_cursor.execute(
-            'INSERT INTO evmtx_receipts (tx_id, contract_address, status, type) '
-            'VALUES(?, ?, ?, ?) ',
-            (tx_id, contract_address, status, tx_type),
+        self.add_multiple_receipt_data(
+            write_cursor=write_cursor,
+            chain_id=chain_id,
+            data_list=[data],
         )
 
-        for log_entry in data['logs']:
-            write_cursor.execute(
-                'INSERT INTO evmtx_receipt_logs (tx_id, log_index, data, address, removed) '
-                'VALUES(? ,? ,? ,? ,?)',
-                (
+    def add_multiple_receipt_data(
+            self,
+            write_cursor: 'DBCursor',
+            chain_id: ChainID,
+            data_list: list[dict[str, Any]],
+            skip_existing: bool = False,
+    ) -> None:
+        """Add multiple tx receipts data as they are returned by the chain to the DB
+
+        All receipts, logs and topics are gathered first and then written with a single
+        executemany per table, all inside the write transaction of the given cursor.
+
+        If skip_existing is True then receipts of transactions that already have a receipt
+        in the DB (e.g. added by another greenlet) are skipped instead of raising.
+
+        This assumes the transactions are already in the DB.
+
+        May raise the same errors as add_receipt_data.
+        """
+        serialized_chain_id = chain_id.serialize_for_db()
+        receipt_tuples = []
+        log_tuples = []
+        topic_tuples = []
+        for data in data_list:
+            tx_hash_b = hexstring_to_bytes(data['transactionHash'])
+            # some nodes miss the type field for older non EIP1559 txs. So assume legacy (0)
+            tx_type = hexstr_to_int(data.get('type', '0x0'))
+            status = data.get('status', 1)  # status may be missing for older txs. Assume 1.
+            if status is None:
+                status = 1
+
+            contract_address = deserialize_evm_address(data['contractAddress']) if data['contractAddress'] else None  # noqa: E501
+            tx_id, has_receipt = write_cursor.execute(
+                'SELECT identifier, EXISTS(SELECT 1 FROM evmtx_receipts '
+                'WHERE tx_id=evm_transactions.identifier) '
+                'FROM evm_transactions WHERE tx_hash=? AND chain_id=?',
+                (tx_hash_b, serialized_chain_id),
+            ).fetchone()
+            if skip_existing is True and has_receipt == 1:
+                continue
+
+            receipt_tuples.append((tx_id, contract_address, status, tx_type))
+            for log_entry in data['logs']:
+                log_index = log_entry['logIndex']
+                log_tuples.append((
                     tx_id,
-                    log_entry['logIndex'],
+                    log_index,
                     hexstring_to_bytes(log_entry['data']),
                     deserialize_evm_address(log_entry['address']),
                     int(log_entry['removed']),
-                ),
-            )
-            log_id = write_cursor.lastrowid
-            topic_tuples = []
-            for idx, topic in enumerate(log_entry['topics']):
-                topic_tuples.append((
-                    log_id,
-                    hexstring_to_bytes(topic),
-                    idx,
                 ))
-            if len(topic_tuples) != 0:
-                write_cursor.executemany(
-                    'INSERT INTO evmtx_receipt_log_topics (log, topic, topic_index) '
-                    'VALUES(? ,? ,?)',
-                    topic_tuples,
+                topic_tuples.extend(
+                    (hexstring_to_bytes(topic), idx, tx_id, log_index)
+                    for idx, topic in enumerate(log_entry['topics'])
                 )
 
+        if len(receipt_tuples) == 0:
+            return
+
+        write_cursor.executemany(
+            'INSERT INTO evmtx_receipts (tx_id, contract_address, status, type) '
+            'VALUES(?, ?, ?, ?) ',
+            receipt_tuples,
+        )
+        if len(log_tuples) != 0:
+            write_cursor.executemany(
+                'INSERT INTO evmtx_receipt_logs (tx_id, log_index, data, address, removed) '
+                'VALUES(? ,? ,? ,? ,?)',
+                log_tuples,
+            )
+        if len(topic_tuples) != 0:  # log ids are found via the (tx_id, log_index) unique index
+            write_cursor.executemany(
+                'INSERT INTO evmtx_receipt_log_topics (log, topic, topic_index) '
+                'SELECT identifier, ?, ? FROM evmtx_receipt_logs WHERE tx_id=? AND log_index=?',
+                topic_tuples,
+            )
+
+    def add_evm_transactions_and_receipts(
+            self,
+            write_cursor: 'DBCursor',
+            chain_id: ChainID,
+            evm_transactions: list[EvmTransaction],
+            receipts_data: list[dict[str, Any]],
+            relevant_address: Optional[ChecksumEvmAddress],
+    ) -> None:
+        """Add evm transactions along with their receipts data as returned by the chain
+
+        The transactions, their address mappings and the receipts are all written in
+        the write transaction of the given cursor.
+
+        May raise the same errors as add_receipt_data.
+        """
+        self.add_evm_transactions(
+            write_cursor=write_cursor,
+            evm_transactions=evm_transactions,
+            relevant_address=relevant_address,
+        )
+        self.add_multiple_receipt_data(
+            write_cursor=write_cursor,
+            chain_id=chain_id,
+            data_list=receipts_data,
+        )
+
     def get_receipt(
             self,
             cursor: 'DBCursor',
@@ -398,24 +480,23 @@ class DBEvmTx:
             type=result[2],
         )
 
+        # Get all logs along with their topics in one query. Each log appears in as many
+        # consecutive rows as its topics (or once with a NULL topic if it has none)
         cursor.execute(
-            'SELECT identifier, log_index, data, address, removed from evmtx_receipt_logs WHERE tx_id=?',  # noqa: E501
-            (tx_id,))
-        with self.db.conn.read_ctx() as other_cursor:
-            for result in cursor:
-                tx_receipt_log = EvmTxReceiptLog(
-                    log_index=result[1],
-                    data=result[2],
-                    address=result[3],
-                    removed=bool(result[4]),  # works since value is either 0 or 1
-                )
-                other_cursor.execute(
-                    'SELECT topic from evmtx_receipt_log_topics '
-                    'WHERE log=? ORDER BY topic_index ASC',
-                    (result[0],),
-                )
-                tx_receipt_log.topics = [x[0] for x in other_cursor]
-                tx_receipt.logs.append(tx_receipt_log)
+            'SELECT L.identifier, L.log_index, L.data, L.address, L.removed, T.topic '
+            'FROM evmtx_receipt_logs AS L LEFT JOIN evmtx_receipt_log_topics AS T '
+            'ON L.identifier=T.log WHERE L.tx_id=? ORDER BY L.log_index ASC, T.topic_index ASC',
+            (tx_id,),
+        )
+        for _, log_group in itertools.groupby(cursor.fetchall(), key=lambda x: x[0]):
+            log_rows = list(log_group)
+            tx_receipt.logs.append(EvmTxReceiptLog(
+                log_index=log_rows[0][1],
+                data=log_rows[0][2],
+                address=log_rows[0][3],
+                removed=bool(log_rows[0][4]),  # works since value is either 0 or 1
+                topics=[x[5] for x in log_rows if x[5] is not None],
+            ))
 
         return tx_receipt
 
@@ -444,19 +525,13 @@ class DBEvmTx:
         )
         # Get all tx_hashes that are touched by this address and no other address for the chain
         result = write_cursor.execute(
-            'SELECT A.tx_hash, A.identifier from evmtx_address_mappings AS B INNER JOIN '
+            'SELECT A.tx_hash from evmtx_address_mappings AS B INNER JOIN '
             'evm_transactions AS A ON A.identifier=B.tx_id WHERE B.address=? AND B.tx_id NOT IN ( '
             'SELECT tx_id from evmtx_address_mappings WHERE address!=? AND chain_id=?'
             ')',
             (address, address, chain_id_serialized),
         )
-        tx_hashes = []
-        tx_ids = []
-        for tx_hash, tx_id in result:
-            tx_hashes.append(deserialize_evm_tx_hash(tx_hash))
-            tx_ids.append(tx_id)
-
-        genesis_tx_id = None
+        tx_hashes = [deserialize_evm_tx_hash(x[0]) for x in result]
         if len(tx_hashes) == 0:
             # Need to handle the genesis tx separately since our single genesis tx contains
             # multiple genesis transactions from multiple addresses.
@@ -467,7 +542,6 @@ class DBEvmTx:
             ).fetchone()
             if genesis_tx_id is None:
                 return
-            genesis_tx_id = genesis_tx_id[0]
 
         dbevents.delete_events_by_tx_hash(
             write_cursor=write_cursor,
@@ -488,20 +562,31 @@ class DBEvmTx:
         if genesis_events_count == 0:
             # If there are no more events in the genesis tx, delete it
             tx_hashes.append(GENESIS_HASH)
-            if genesis_tx_id is not None:
-                tx_ids.append(genesis_tx_id)
 
+        # Stage the hashes in a temp table so that each of the deletes below is a single
+        # set based statement instead of one statement execution per transaction
+        write_cursor.execute(
+            'CREATE TEMP TABLE IF NOT EXISTS delete_tx_hashes (tx_hash BLOB NOT NULL PRIMARY KEY)',
+        )
+        write_cursor.executemany(
+            'INSERT OR IGNORE INTO delete_tx_hashes(tx_hash) VALUES(?)',
+            [(x,) for x in tx_hashes],
+        )
         # Now delete all relevant transactions. By deleting all relevant transactions all tables
         # are cleared thanks to cascading (except for history_events which was cleared above)
-        write_cursor.executemany(
-            'DELETE FROM evm_transactions WHERE tx_hash=? AND chain_id=? AND tx_hash NOT IN (SELECT tx_hash FROM evm_events_info)',  # noqa: E501
-            [(x, chain_id_serialized) for x in tx_hashes],
+        write_cursor.execute(
+            'DELETE FROM evm_transactions WHERE chain_id=? AND tx_hash IN '
+            '(SELECT tx_hash FROM delete_tx_hashes) AND tx_hash NOT IN '
+            '(SELECT tx_hash FROM evm_events_info)',
+            (chain_id_serialized,),
         )
         # Delete all remaining evm_tx_mappings so decoding can happen again for customized events
-        write_cursor.executemany(
-            'DELETE FROM evm_tx_mappings WHERE tx_id=? AND value=?',
-            [(x, HISTORY_MAPPING_STATE_DECODED) for x in tx_ids],
+        write_cursor.execute(
+            'DELETE FROM evm_tx_mappings WHERE value=? AND tx_id IN (SELECT identifier FROM '
+            'evm_transactions WHERE chain_id=? AND tx_hash IN (SELECT tx_hash FROM delete_tx_hashes))',  # noqa: E501
+            (HISTORY_MAPPING_STATE_DECODED, chain_id_serialized),
         )
+        write_cursor.execute('DROP TABLE delete_tx_hashes')
 
     def get_queried_range(
             self,
@@ -1,3 +1,6 @@
+import heapq
+import itertools
+from collections.abc import Callable
 from typing import TYPE_CHECKING, Any, Optional
 
 from polyleven import levenshtein
@@ -5,101 +8,136 @@ from polyleven import levenshtein
 from rotkehlchen.assets.types import AssetType
 from rotkehlchen.constants.assets import A_ETH, A_ETH2
 from rotkehlchen.constants.resolver import ChainID
-from rotkehlchen.globaldb.handler import ALL_ASSETS_TABLES_QUERY, GlobalDBHandler
+from rotkehlchen.globaldb.handler import ALL_ASSETS_TABLES_QUERY
 
 if TYPE_CHECKING:
+    from collections.abc import Iterable
+
     from rotkehlchen.db.dbhandler import DBHandler
     from rotkehlchen.db.drivers.gevent import DBCursor
     from rotkehlchen.db.filtering import LevenshteinFilterQuery
 
+# distance given to a column that is missing. Higher than any realistic distance.
+MAX_LEVENSHTEIN_DISTANCE = 100
+
+# Serialized asset types and chain names keyed by their DB values
+_SERIALIZED_ASSET_TYPES = {x.serialize_for_db(): x.serialize() for x in AssetType}
+_CHAIN_NAMES = {x.serialize_for_db(): x.to_name() for x in ChainID}
+
+# distance, function to turn the row into the returned details and the DB row
+SearchResultRow = tuple[int, Callable[[tuple], dict[str, Any]], tuple]
+
+
+def casefolded_levenshtein(keyword: str, value: Optional[str]) -> Optional[int]:
+    """Levenshtein distance between the already casefolded keyword and the given value.
+
+    It is registered as the `levenshtein` SQL function of the user DB connection so that
+    the search results can be ranked and limited inside the query. Returns None for a
+    NULL value so that each query can decide how a missing column is ranked.
+
+    Queries pass the value through SQL's lower() which is equal to casefold() for ascii
+    strings, so only non-ascii values need to be casefolded here.
+    """
+    if value is None:
+        return None
+    return levenshtein(keyword, value if value.isascii() else value.casefold())
+
+
+def _nft_row_to_info(entry: tuple) -> dict[str, Any]:
+    return {
+        'identifier': entry[0],
+        'name': entry[1],
+        'collection_name': entry[2],
+        'asset_type': AssetType.NFT.serialize(),
+    }
+
+
+def _asset_row_to_info(entry: tuple) -> dict[str, Any]:
+    if (asset_type := _SERIALIZED_ASSET_TYPES.get(entry[4])) is None:
+        asset_type = AssetType.deserialize_from_db(entry[4]).serialize()  # raises proper error
+    entry_info = {
+        'identifier': entry[0],
+        'name': entry[1],
+        'symbol': entry[2],
+        'asset_type': asset_type,
+    }
+    if entry[3] is not None:
+        if (chain_name := _CHAIN_NAMES.get(entry[3])) is None:
+            chain_name = ChainID.deserialize_from_db(entry[3]).to_name()  # raises proper error
+        entry_info['evm_chain'] = chain_name
+    if entry[5] is not None:
+        entry_info['custom_asset_type'] = entry[5]
+
+    return entry_info
+
 
 def _search_only_nfts_levenstein(
         cursor: 'DBCursor',
         filter_query: 'LevenshteinFilterQuery',
-) -> list[tuple[int, dict[str, Any]]]:
+        limit: Optional[int],
+) -> list[SearchResultRow]:
+    """Returns the matching nft rows along with their distance, sorted by distance"""
     query, bindings = filter_query.prepare('nfts')
-    cursor.execute('SELECT identifier, name, collection_name FROM nfts ' + query, bindings)
-    search_result: list[tuple[int, dict[str, Any]]] = []
-    for entry in cursor:
-        lev_dist_min = 100
-        if entry[1] is not None:
-            lev_dist_min = min(
-                lev_dist_min,
-                levenshtein(filter_query.substring_search, entry[1].casefold()),
-            )
-        if entry[2] is not None:
-            lev_dist_min = min(
-                lev_dist_min,
-                levenshtein(filter_query.substring_search, entry[2].casefold()),
-            )
-        entry_info = {
-            'identifier': entry[0],
-            'name': entry[1],
-            'collection_name': entry[2],
-            'asset_type': AssetType.NFT.serialize(),
-        }
-        search_result.append((lev_dist_min, entry_info))
+    query = (
+        'SELECT identifier, name, collection_name, MIN('
+        f'COALESCE(levenshtein(?, lower(name)), {MAX_LEVENSHTEIN_DISTANCE}), '
+        f'COALESCE(levenshtein(?, lower(collection_name)), {MAX_LEVENSHTEIN_DISTANCE})'
+        ') AS distance FROM nfts ' + query + ' ORDER BY distance'
+    )
+    bindings = [filter_query.substring_search, filter_query.substring_search, *bindings]
+    if limit is not None:
+        query += ' LIMIT ?'
+        bindings.append(limit)
 
-    return search_result
+    return [(entry[3], _nft_row_to_info, entry) for entry in cursor.execute(query, bindings)]
 
 
 def _search_only_assets_levenstein(
         cursor: 'DBCursor',
         db: 'DBHandler',
         filter_query: 'LevenshteinFilterQuery',
-) -> list[tuple[int, dict[str, Any]]]:
-    search_result: list[tuple[int, dict[str, Any]]] = []
-    resolved_eth = A_ETH.resolve_to_crypto_asset()
-    globaldb = GlobalDBHandler()
+        limit: Optional[int],
+) -> list[SearchResultRow]:
+    """Returns the matching asset rows along with their distance, sorted by distance"""
+    search_result: list[SearchResultRow] = []
     treat_eth2_as_eth = db.get_settings(cursor).treat_eth2_as_eth
-    with db.conn.critical_section():  # needed due to ATTACH. Must not context switch out of this
-        cursor.execute(
-            f'ATTACH DATABASE "{globaldb.filepath()!s}" AS globaldb KEY "";',
+    # reads from the attached globaldb. Don't context switch while holding its read lock
+    with db.conn.critical_section():
+        query, bindings = filter_query.prepare('assets')
+        query = (
+            'SELECT *, MIN('
+            f'COALESCE(levenshtein(?, lower(name)), {MAX_LEVENSHTEIN_DISTANCE}), '
+            f'COALESCE(levenshtein(?, lower(symbol)), {MAX_LEVENSHTEIN_DISTANCE})'
+            ') AS distance FROM (' +
+            ALL_ASSETS_TABLES_QUERY.format(dbprefix='globaldb.') + query +
+            ') ORDER BY distance'
         )
-        try:
-            query, bindings = filter_query.prepare('assets')
-            query = ALL_ASSETS_TABLES_QUERY.format(dbprefix='globaldb.') + query
-            cursor.execute(query, bindings)
-            found_eth = False
-            for entry in cursor:
-                lev_dist_min = 100
-                if entry[1] is not None:
-                    lev_dist_min = min(
-                        lev_dist_min,
-                        levenshtein(filter_query.substring_search, entry[1].casefold()),
-                    )
-                if entry[2] is not None:
-                    lev_dist_min = min(
-                        lev_dist_min,
-                        levenshtein(filter_query.substring_search, entry[2].casefold()),
-                    )
-                if treat_eth2_as_eth is True and entry[0] in (A_ETH.identifier, A_ETH2.identifier):
-                    if found_eth is False:
-                        search_result.append((lev_dist_min, {
-                            'identifier': resolved_eth.identifier,
-                            'name': resolved_eth.name,
-                            'symbol': resolved_eth.symbol,
-                            'asset_type': AssetType.OWN_CHAIN.serialize(),
-                        }))
-                        found_eth = True
-                    continue
-
-                entry_info = {
-                    'identifier': entry[0],
-                    'name': entry[1],
-                    'symbol': entry[2],
-                    'asset_type': AssetType.deserialize_from_db(entry[4]).serialize(),
-                }
-                if entry[3] is not None:
-                    entry_info['evm_chain'] = ChainID.deserialize_from_db(entry[3]).to_name()
-                if entry[5] is not None:
-                    entry_info['custom_asset_type'] = entry[5]
-
-                search_result.append((lev_dist_min, entry_info))
-        finally:
-            cursor.execute('DETACH globaldb;')
-
-    return search_result
+        bindings = [filter_query.substring_search, filter_query.substring_search, *bindings]
+        if limit is not None:
+            query += ' LIMIT ?'
+            # ETH and ETH2 may be merged into a single entry so ask for one more
+            bindings.append(limit + 1 if treat_eth2_as_eth is True else limit)
+
+        cursor.execute(query, bindings)
+        found_eth = False
+        for entry in cursor:
+            if treat_eth2_as_eth is True and entry[0] in (A_ETH.identifier, A_ETH2.identifier):
+                if found_eth is False:
+                    resolved_eth = A_ETH.resolve_to_crypto_asset()
+                    search_result.append((entry[6], _asset_row_to_info, (
+                        resolved_eth.identifier,
+                        resolved_eth.name,
+                        resolved_eth.symbol,
+                        None,
+                        AssetType.OWN_CHAIN.serialize_for_db(),
+                        None,
+                    )))
+                    found_eth = True
+                continue
+
+            search_result.append((entry[6], _asset_row_to_info, entry))
+
+    return search_result[:limit] if limit is not None else search_result
 
 
 def search_assets_levenshtein(
@@ -108,16 +146,26 @@ def search_assets_levenshtein(
         limit: Optional[int],
         search_nfts: bool,
 ) -> list[dict[str, Any]]:
-    """Returns a list of asset details that match the search keyword using the Levenshtein distance approach."""  # noqa: E501
-    search_result = []
+    """Returns a list of asset details that match the search keyword using the Levenshtein distance approach.
+
+    Ranking and limiting happens in the DB queries, so only the already sorted
+    assets and nfts results need to be merged here. The returned details are only
+    created for the rows that make it into the result.
+    """  # noqa: E501
+    search_result: 'Iterable[SearchResultRow]'
     with db.conn.read_ctx() as cursor:
         search_result = _search_only_assets_levenstein(
             cursor=cursor,
             db=db,
             filter_query=filter_query,
+            limit=limit,
         )
         if search_nfts is True:
-            search_result += _search_only_nfts_levenstein(cursor=cursor, filter_query=filter_query)
+            search_result = heapq.merge(
+                search_result,
+                _search_only_nfts_levenstein(cursor=cursor, filter_query=filter_query, limit=limit),  # noqa: E501
+                key=lambda item: item[0],
+            )
 
-    sorted_search_result = [result for _, result in sorted(search_result, key=lambda item: item[0])]  # noqa: E501
-    return sorted_search_result[:limit] if limit is not None else sorted_search_result
+    # merge lazily and stop after `limit` entries instead of building the full merged list
+    return [row_to_info(row) for _, row_to_info, row in itertools.islice(search_result, limit)]
@@ -340,6 +340,7 @@ def upgrade_v39_to_v40(db: 'DBHandler', progress_handler: 'DBUpgradeProgressHand
         - Migrate rotki events that were broken due to https://github.com/rotki/rotki/issues/6550
         - Purge kraken events
         - Create new tables
+        - Gather query planner statistics for the evm transaction tables
     """
     log.debug('Entered userdb v39->v40 upgrade')
     progress_handler.set_total_steps(8)
@@ -360,6 +361,10 @@ def upgrade_v39_to_v40(db: 'DBHandler', progress_handler: 'DBUpgradeProgressHand
         progress_handler.new_step()
 
     db.conn.execute('VACUUM;')
+    db.conn.executescript(
+        'ANALYZE evm_transactions; ANALYZE evmtx_receipts; '
+        'ANALYZE evmtx_receipt_logs; ANALYZE evmtx_receipt_log_topics;',
+    )
     progress_handler.new_step()
 
     log.debug('Finished userdb v39->v40 upgrade')
@@ -1,20 +1,22 @@
 import binascii
-import hashlib
+import functools
 import hmac
+import itertools
 import json
 import logging
+import math
 import time
 from base64 import b64decode, b64encode
-from collections import defaultdict
-from collections.abc import Iterator
+from collections.abc import Callable, Iterator
 from contextlib import suppress
 from http import HTTPStatus
 from json.decoder import JSONDecodeError
-from typing import TYPE_CHECKING, Any, Literal, Optional, Union
+from typing import TYPE_CHECKING, Any, Literal, Optional, TypeVar, Union
 from urllib.parse import urlencode
 
 import gevent
 import requests
+from gevent.pool import Pool
 
 from rotkehlchen.accounting.structures.balance import Balance
 from rotkehlchen.assets.asset import AssetWithOracles
@@ -22,6 +24,7 @@ from rotkehlchen.assets.converters import asset_from_coinbasepro
 from rotkehlchen.assets.types import AssetType
 from rotkehlchen.constants import ZERO
 from rotkehlchen.constants.assets import A_ETH
+from rotkehlchen.constants.timing import MONTH_IN_SECONDS
 from rotkehlchen.db.settings import CachedSettings
 from rotkehlchen.errors.asset import UnknownAsset, UnprocessableTradePair, UnsupportedAsset
 from rotkehlchen.errors.misc import RemoteError
@@ -41,10 +44,12 @@ from rotkehlchen.serialization.deserialize import (
 from rotkehlchen.types import (
     ApiKey,
     ApiSecret,
+    AssetAmount,
     AssetMovementCategory,
     ExchangeAuthCredentials,
     Fee,
     Location,
+    Price,
     Timestamp,
     TradeType,
 )
@@ -56,17 +61,30 @@ from rotkehlchen.utils.serialization import jsonloads_dict, jsonloads_list
 if TYPE_CHECKING:
     from rotkehlchen.accounting.structures.base import HistoryEvent
     from rotkehlchen.db.dbhandler import DBHandler
+    from rotkehlchen.fval import FVal
 
 logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
 
 
 COINBASEPRO_PAGINATION_LIMIT = 100  # default + max limit
-
-
-def coinbasepro_to_worldpair(product: str) -> tuple[AssetWithOracles, AssetWithOracles]:
+# max number of paginated queries to run concurrently. Kept low to not hit the rate limit.
+# Also needs to stay below the requests session connection pool size (10 by default) so
+# that the concurrent queries reuse kept-alive connections instead of opening new ones
+COINBASEPRO_MAX_PARALLEL_QUERIES = 4
+# how long before the queried range a transfer may have been created and still only
+# complete inside the range. Transfer pagination goes this far back past the range start
+COINBASEPRO_TRANSFER_GRACE_PERIOD = MONTH_IN_SECONDS
+
+
+def coinbasepro_to_worldpair(
+        product: str,
+        asset_getter: Callable[[str], AssetWithOracles] = asset_from_coinbasepro,
+) -> tuple[AssetWithOracles, AssetWithOracles]:
     """Turns a coinbasepro product into our base/quote assets
 
+    asset_getter can be given to resolve the assets via a cache
+
     - Can raise UnprocessableTradePair if product is in unexpected format
     - Case raise UnknownAsset if any of the pair assets are not known to rotki
     """
@@ -74,8 +92,8 @@ def coinbasepro_to_worldpair(product: str) -> tuple[AssetWithOracles, AssetWithO
     if len(parts) != 2:
         raise UnprocessableTradePair(product)
 
-    base_asset = asset_from_coinbasepro(parts[0])
-    quote_asset = asset_from_coinbasepro(parts[1])
+    base_asset = asset_getter(parts[0])
+    quote_asset = asset_getter(parts[1])
 
     return base_asset, quote_asset
 
@@ -84,6 +102,14 @@ class CoinbaseProPermissionError(Exception):
     pass
 
 
+def _decode_secret(secret: ApiSecret) -> Optional[bytes]:
+    """Decodes the base64 encoded coinbasepro API secret. Returns None if it's invalid"""
+    try:
+        return b64decode(secret)
+    except binascii.Error:
+        return None
+
+
 def coinbasepro_deserialize_timestamp(entry: dict[str, Any], key: str) -> Timestamp:
     """Deserialize a timestamp from coinbasepro
 
@@ -93,11 +119,97 @@ def coinbasepro_deserialize_timestamp(entry: dict[str, Any], key: str) -> Timest
     """
     raw_time = entry[key]
     if raw_time.endswith('+00'):  # proper iso8601 needs + 00:00 for timezone
-        raw_time = raw_time.replace('+00', '+00:00')
+        raw_time = raw_time[:-3] + '+00:00'
     timestamp = deserialize_timestamp_from_date(raw_time, 'iso8601', 'coinbasepro')
     return timestamp
 
 
+T = TypeVar('T')
+
+
+def _call_returning_error(call: Callable[[], T]) -> Union[T, Exception]:
+    """Runs call and returns any error it raises instead of raising it
+
+    Used as the greenlet target so that gevent does not print the traceback of failed
+    greenlets. The caller re-raises the error.
+    """
+    try:
+        return call()
+    except Exception as e:  # pylint: disable=broad-except
+        return e
+
+
+def _run_concurrently(calls: list[Callable[[], T]]) -> list[T]:
+    """Runs the given query calls concurrently and returns their results in order
+
+    If a call raises, the still running calls are killed and the error is re-raised.
+    """
+    pool = Pool(COINBASEPRO_MAX_PARALLEL_QUERIES)
+    greenlets = [pool.spawn(_call_returning_error, call) for call in calls]
+    results = []
+    try:
+        for greenlet in greenlets:
+            if isinstance(result := greenlet.get(), Exception):
+                raise result
+            results.append(result)
+    finally:
+        pool.kill()
+
+    return results
+
+
+def _batch_created_before(batch: list[dict[str, Any]], timestamp: Timestamp) -> bool:
+    """Returns True if the last entry of a newest first batch was created before timestamp"""
+    try:
+        return coinbasepro_deserialize_timestamp(batch[-1], 'created_at') < timestamp
+    except (KeyError, DeserializationError):
+        return False  # can't tell so keep paginating
+
+
+def _order_may_have_fills_in_range(
+        order: dict[str, Any],
+        start_ts: Timestamp,
+        end_ts: Timestamp,
+) -> bool:
+    """Returns False only if an order can't have any fills in the given time range.
+
+    That is when it was created after the range or done before it. Orders that are not
+    done yet may have been partially filled in the range. If the order's timestamps
+    can't be read, True is returned to be on the safe side.
+    """
+    try:
+        if coinbasepro_deserialize_timestamp(order, 'created_at') > end_ts:
+            return False
+        if order.get('done_at') is None:
+            return True  # still open
+        return coinbasepro_deserialize_timestamp(order, 'done_at') >= start_ts
+    except (KeyError, AttributeError, DeserializationError):  # missing or null timestamps
+        return True
+
+
+def _transfers_batch_past_range(batch: list[dict[str, Any]], start_ts: Timestamp) -> bool:
+    """Returns True if no transfer after this newest first batch can complete in range
+
+    Transfers are ordered by creation time but can stay pending for a while. So this is
+    only True once the oldest transfer of the batch was created a grace period before
+    start_ts and no transfer of the batch completed at or after start_ts.
+    """
+    if not _batch_created_before(batch, Timestamp(start_ts - COINBASEPRO_TRANSFER_GRACE_PERIOD)):
+        return False
+
+    for entry in batch:
+        if entry.get('completed_at') is None:
+            continue  # still pending. Will be picked up by the range it completes in
+
+        try:
+            if coinbasepro_deserialize_timestamp(entry, 'completed_at') >= start_ts:
+                return False
+        except DeserializationError:
+            return False  # can't tell so keep paginating
+
+    return True
+
+
 class Coinbasepro(ExchangeInterface):
 
     def __init__(
@@ -120,6 +232,12 @@ class Coinbasepro(ExchangeInterface):
         self.msg_aggregator = msg_aggregator
         self.account_to_currency: Optional[dict[str, AssetWithOracles]] = None
         self.available_products = {0}
+        self.secret_key = _decode_secret(secret)
+        # request url -> (ETag, result) of endpoints queried with conditional requests
+        self.etag_cache: dict[str, tuple[str, list[Any]]] = {}
+        self.asset_cache: dict[str, AssetWithOracles] = {}  # coinbasepro symbol -> asset
+        # available product id -> (base, quote) assets for the products known to rotki
+        self.product_assets: dict[str, tuple[AssetWithOracles, AssetWithOracles]] = {}
 
         self.session.headers.update({
             'Content-Type': 'Application/JSON',
@@ -132,6 +250,10 @@ class Coinbasepro(ExchangeInterface):
 
     def edit_exchange_credentials(self, credentials: ExchangeAuthCredentials) -> bool:
         changed = super().edit_exchange_credentials(credentials)
+        if changed:
+            self.etag_cache = {}
+        if credentials.api_secret is not None:
+            self.secret_key = _decode_secret(credentials.api_secret)
         if credentials.api_key is not None:
             self.session.headers.update({'CB-ACCESS-KEY': self.api_key})
         if credentials.passphrase is not None:
@@ -173,6 +295,13 @@ class Coinbasepro(ExchangeInterface):
 
         products_response, _ = self._api_query('products')
         self.available_products = {x['id'] for x in products_response}
+        for product_id in self.available_products:
+            # products that can't be processed are reported if a trade of them is found
+            with suppress(UnprocessableTradePair, UnknownAsset, UnsupportedAsset, DeserializationError):  # noqa: E501
+                self.product_assets[product_id] = coinbasepro_to_worldpair(
+                    product=product_id,
+                    asset_getter=self._asset_from_coinbasepro,
+                )
         self.first_connection_made = True
 
     def _api_query(
@@ -181,11 +310,15 @@ class Coinbasepro(ExchangeInterface):
             request_method: Literal['GET', 'POST'] = 'GET',
             options: Optional[dict[str, Any]] = None,
             query_options: Optional[dict[str, Any]] = None,
+            use_etag: bool = False,
     ) -> tuple[list[Any], Optional[str]]:
         """Performs a coinbase PRO API Query for endpoint
 
         You can optionally provide extra arguments to the endpoint via the options argument.
 
+        If use_etag is True the response is cached with its ETag and a conditional request
+        is made the next time. If the server responds with 304 the cached result is returned.
+
         Returns a tuple of the result and optional pagination cursor.
 
         Raises RemoteError if something went wrong with connecting or reading from the exchange
@@ -194,7 +327,6 @@ class Coinbasepro(ExchangeInterface):
         """
         request_url = f'/{endpoint}'
 
-        timestamp = str(int(time.time()))
         if options:
             stringified_options = json.dumps(options, separators=(',', ':'))
         else:
@@ -204,24 +336,26 @@ class Coinbasepro(ExchangeInterface):
         if query_options:
             request_url += '?' + urlencode(query_options)
 
-        message = timestamp + request_method + request_url + stringified_options
+        headers: dict[str, str] = {}
+        if 'products' not in endpoint:  # products is public, so no need to sign
+            if self.secret_key is None:
+                raise RemoteError('Provided API Secret is invalid')
 
-        if 'products' not in endpoint:
-            try:
-                signature = hmac.new(
-                    b64decode(self.secret),
-                    message.encode(),
-                    hashlib.sha256,
-                ).digest()
-            except binascii.Error as e:
-                raise RemoteError('Provided API Secret is invalid') from e
-
-            self.session.headers.update({
-                'CB-ACCESS-SIGN': b64encode(signature).decode('utf-8'),
-                'CB-ACCESS-TIMESTAMP': timestamp,
-            })
-
-        retries_left = CachedSettings().get_query_retry_limit()
+            timestamp = str(int(time.time()))
+            message = timestamp + request_method + request_url + stringified_options
+            signature = hmac.digest(self.secret_key, message.encode(), 'sha256')
+
+            # per request headers so that the shared session headers are not mutated
+            headers['CB-ACCESS-SIGN'] = b64encode(signature).decode('utf-8')
+            headers['CB-ACCESS-TIMESTAMP'] = timestamp
+
+        cached_entry = self.etag_cache.get(request_url) if use_etag else None
+        if cached_entry is not None:
+            headers['If-None-Match'] = cached_entry[0]
+
+        settings = CachedSettings()
+        retry_limit = retries_left = settings.get_query_retry_limit()
+        timeout = settings.get_timeout_tuple()
         while retries_left > 0:
             log.debug(
                 'Coinbase Pro API query',
@@ -234,8 +368,9 @@ class Coinbasepro(ExchangeInterface):
                 response = self.session.request(
                     request_method.lower(),
                     full_url,
-                    data=stringified_options,
-                    timeout=CachedSettings().get_timeout_tuple(),
+                    data=stringified_options or None,  # don't send an empty body
+                    headers=headers,
+                    timeout=timeout,
                 )
             except requests.exceptions.RequestException as e:
                 raise RemoteError(
@@ -244,8 +379,17 @@ class Coinbasepro(ExchangeInterface):
                 ) from e
 
             if response.status_code == HTTPStatus.TOO_MANY_REQUESTS:
-                # Backoff a bit by sleeping. Sleep more, the more retries have been made
-                backoff_secs = CachedSettings().get_query_retry_limit() / retries_left
+                # Backoff by sleeping for as long as the server asks us to, if it does,
+                # bounded to the retry limit. Otherwise sleep more, the more retries
+                # have been made
+                try:
+                    retry_after = float(response.headers['Retry-After'])
+                except (KeyError, ValueError):
+                    retry_after = math.nan
+                if math.isfinite(retry_after):
+                    backoff_secs = min(max(retry_after, 0), retry_limit)
+                else:
+                    backoff_secs = retry_limit / retries_left
                 log.debug(f'Backing off coinbase pro api query for {backoff_secs} secs')
                 gevent.sleep(backoff_secs)
                 retries_left -= 1
@@ -253,9 +397,12 @@ class Coinbasepro(ExchangeInterface):
                 # get out of the retry loop, we did not get 429 complaint
                 break
 
+        if response.status_code == HTTPStatus.NOT_MODIFIED and cached_entry is not None:
+            return cached_entry[1], response.headers.get('cb-after', None)
+
         json_ret: Union[list[Any], dict[str, Any]]
         if response.status_code == HTTPStatus.BAD_REQUEST:
-            json_ret = jsonloads_dict(response.text)
+            json_ret = jsonloads_dict(response.content)
             if json_ret['message'] == 'invalid signature':
                 raise CoinbaseProPermissionError(
                     f'While doing {request_method} at {endpoint} endpoint the API secret '
@@ -275,24 +422,39 @@ class Coinbasepro(ExchangeInterface):
             )
 
         try:
-            json_ret = jsonloads_list(response.text)
-        except JSONDecodeError as e:
+            json_ret = jsonloads_list(response.content)
+        except (JSONDecodeError, UnicodeDecodeError) as e:
             raise RemoteError(
                 f'Coinbase Pro {request_method} query at {full_url} '
                 f'returned invalid JSON response: {response.text}',
             ) from e
 
+        if use_etag and (etag := response.headers.get('ETag')) is not None:
+            self.etag_cache[request_url] = (etag, json_ret)
+
         return json_ret, response.headers.get('cb-after', None)
 
+    def _asset_from_coinbasepro(self, symbol: str) -> AssetWithOracles:
+        """Like asset_from_coinbasepro but remembers the successfully resolved symbols
+
+        May raise same errors as asset_from_coinbasepro
+        """
+        if not isinstance(symbol, str):  # let the converter raise the proper error
+            return asset_from_coinbasepro(symbol)
+
+        if (asset := self.asset_cache.get(symbol)) is None:
+            asset = self.asset_cache[symbol] = asset_from_coinbasepro(symbol)
+        return asset
+
     def create_or_return_account_to_currency_map(self) -> dict[str, AssetWithOracles]:
         if self.account_to_currency is not None:
             return self.account_to_currency
 
-        accounts, _ = self._api_query('accounts')
+        accounts, _ = self._api_query('accounts', use_etag=True)
         self.account_to_currency = {}
         for account in accounts:
             try:
-                asset = asset_from_coinbasepro(account['currency'])
+                asset = self._asset_from_coinbasepro(account['currency'])
                 self.account_to_currency[account['id']] = asset
             except UnsupportedAsset as e:
                 self.msg_aggregator.add_warning(
@@ -319,13 +481,13 @@ class Coinbasepro(ExchangeInterface):
     @cache_response_timewise()
     def query_balances(self) -> ExchangeQueryBalances:
         try:
-            accounts, _ = self._api_query('accounts')
+            accounts, _ = self._api_query('accounts', use_etag=True)
         except (CoinbaseProPermissionError, RemoteError) as e:
             msg = f'Coinbase Pro API request failed. {e!s}'
             log.error(msg)
             return None, msg
 
-        assets_balance: defaultdict[AssetWithOracles, Balance] = defaultdict(Balance)
+        account_balances: list[tuple[AssetWithOracles, AssetAmount]] = []
         for account in accounts:
             try:
                 amount = deserialize_asset_amount(account['balance'])
@@ -334,20 +496,8 @@ class Coinbasepro(ExchangeInterface):
                 if amount == ZERO:
                     continue
 
-                asset = asset_from_coinbasepro(account['currency'])
-                try:
-                    usd_price = Inquirer().find_usd_price(asset=asset)
-                except RemoteError as e:
-                    self.msg_aggregator.add_error(
-                        f'Error processing coinbasepro balance result due to inability to '
-                        f'query USD price: {e!s}. Skipping balance entry',
-                    )
-                    continue
-
-                assets_balance[asset] += Balance(
-                    amount=amount,
-                    usd_value=amount * usd_price,
-                )
+                asset = self._asset_from_coinbasepro(account['currency'])
+                account_balances.append((asset, amount))
             except UnknownAsset as e:
                 self.msg_aggregator.add_warning(
                     f'Found coinbase pro balance result with unknown asset '
@@ -375,25 +525,105 @@ class Coinbasepro(ExchangeInterface):
                 )
                 continue
 
-        return dict(assets_balance), ''
+        def query_usd_price(asset: AssetWithOracles) -> Optional[Price]:
+            """Returns None if the price can't be found so that only this asset is skipped.
+            Catches the same errors the balance processing loop did when the price was queried
+            inside of it, since they now happen in a separate greenlet."""
+            try:
+                return Inquirer().find_usd_price(asset=asset)
+            except RemoteError as e:
+                self.msg_aggregator.add_error(
+                    f'Error processing coinbasepro balance result due to inability to '
+                    f'query USD price: {e!s}. Skipping balance entry',
+                )
+            except UnknownAsset as e:
+                self.msg_aggregator.add_warning(
+                    f'Found coinbase pro balance result with unknown asset '
+                    f'{e.identifier}. Ignoring it.',
+                )
+            except UnsupportedAsset as e:
+                self.msg_aggregator.add_warning(
+                    f'Found coinbase pro balance result with unsupported asset '
+                    f'{e.identifier}. Ignoring it.',
+                )
+            except (DeserializationError, KeyError) as e:
+                msg = str(e)
+                if isinstance(e, KeyError):
+                    msg = f'Missing key entry for {msg}.'
+                self.msg_aggregator.add_error(
+                    'Error processing a coinbase pro account balance. Check logs '
+                    'for details. Ignoring it.',
+                )
+                log.error(
+                    'Error querying the price of a coinbase pro account balance',
+                    asset=asset,
+                    error=msg,
+                )
+            return None
+
+        # query the prices of all owned assets concurrently
+        owned_assets = list({asset for asset, _ in account_balances})
+        price_results = _run_concurrently(
+            [functools.partial(query_usd_price, asset) for asset in owned_assets],
+        )
+        usd_prices = {
+            asset: usd_price for asset, usd_price in zip(owned_assets, price_results)
+            if usd_price is not None
+        }
+
+        # sum the amounts of each asset and create a single Balance per asset at the end
+        asset_amounts: dict[AssetWithOracles, 'FVal'] = {}
+        for asset, amount in account_balances:
+            if asset not in usd_prices:
+                continue  # price query failed
+
+            asset_amounts[asset] = asset_amounts.get(asset, ZERO) + amount
+
+        return {
+            asset: Balance(amount=amount, usd_value=amount * usd_prices[asset])
+            for asset, amount in asset_amounts.items()
+        }, ''
 
     def _paginated_query(
             self,
             endpoint: str,
             query_options: Optional[dict[str, Any]] = None,
             limit: int = COINBASEPRO_PAGINATION_LIMIT,
+            stop_predicate: Optional[Callable[[list[dict[str, Any]]], bool]] = None,
     ) -> Iterator[list[dict[str, Any]]]:
+        """Yields each page of results of a paginated endpoint
+
+        If a stop_predicate is given, pagination stops after the first page for which
+        it returns True.
+        """
         if query_options is None:
             query_options = {}
         query_options['limit'] = limit
         while True:
             result, after_cursor = self._api_query(endpoint=endpoint, query_options=query_options)
             yield result
-            if after_cursor is None or len(result) < limit:
+            if after_cursor is None or len(result) < limit or (stop_predicate is not None and stop_predicate(result)):  # noqa: E501
                 break
 
             query_options['after'] = after_cursor
 
+    def _query_all_pages(
+            self,
+            endpoint: str,
+            query_options: Optional[dict[str, Any]] = None,
+            stop_predicate: Optional[Callable[[list[dict[str, Any]]], bool]] = None,
+    ) -> list[list[dict[str, Any]]]:
+        """Walks all pages of a paginated endpoint and returns the list of pages.
+        The pages are not concatenated, callers should chain over them.
+
+        May raise same errors as _api_query
+        """
+        return list(self._paginated_query(
+            endpoint=endpoint,
+            query_options=query_options,
+            stop_predicate=stop_predicate,
+        ))
+
     def query_online_deposits_withdrawals(
             self,
             start_ts: Timestamp,
@@ -402,19 +632,24 @@ class Coinbasepro(ExchangeInterface):
         """Queries coinbase pro for asset movements"""
         log.debug('Query coinbasepro asset movements', start_ts=start_ts, end_ts=end_ts)
         movements = []
-        raw_movements = []
-        for batch in self._paginated_query(
+        # transfers come newest first, so stop paginating once none can complete in range
+        transfer_results = _run_concurrently([functools.partial(
+            self._query_all_pages,
             endpoint='transfers',
-            query_options={'type': 'withdraw'},
-        ):
-            raw_movements.extend(batch)
-        for batch in self._paginated_query(
-            endpoint='transfers',
-            query_options={'type': 'deposit'},
-        ):
-            raw_movements.extend(batch)
+            query_options={'type': transfer_type},
+            stop_predicate=lambda batch: _transfers_batch_past_range(batch, start_ts),
+        ) for transfer_type in ('withdraw', 'deposit')])
+        # iterate the pages of the results without concatenating them
+        raw_movements = itertools.chain.from_iterable(
+            itertools.chain.from_iterable(transfer_results),
+        )
 
         account_to_currency = self.create_or_return_account_to_currency_map()
+        # assets whose transaction hashes need a 0x prefix
+        evm_assets = frozenset(
+            asset for asset in set(account_to_currency.values())
+            if asset == A_ETH or asset.asset_type == AssetType.EVM_TOKEN
+        )
         for entry in raw_movements:
             try:
                 # Check if the transaction has not been completed. If so it should be skipped
@@ -441,17 +676,17 @@ class Coinbasepro(ExchangeInterface):
                 address = None
                 transaction_id = None
                 fee = Fee(ZERO)
-                if category == AssetMovementCategory.DEPOSIT:
-                    with suppress(KeyError):
-                        address = entry['details']['crypto_address']
-                        transaction_id = entry['details']['crypto_transaction_hash']
-                else:  # withdrawal
-                    with suppress(KeyError):
-                        address = entry['details']['sent_to_address']
-                        transaction_id = entry['details']['crypto_transaction_hash']
-                        fee = deserialize_fee(entry['details']['fee'])
-
-                if transaction_id and (asset == A_ETH or asset.asset_type == AssetType.EVM_TOKEN):
+                with suppress(KeyError):
+                    details = entry['details']
+                    if category == AssetMovementCategory.DEPOSIT:
+                        address = details['crypto_address']
+                        transaction_id = details['crypto_transaction_hash']
+                    else:  # withdrawal
+                        address = details['sent_to_address']
+                        transaction_id = details['crypto_transaction_hash']
+                        fee = deserialize_fee(details['fee'])
+
+                if transaction_id and asset in evm_assets:
                     transaction_id = '0x' + transaction_id
 
                 movements.append(AssetMovement(
@@ -499,16 +734,13 @@ class Coinbasepro(ExchangeInterface):
         self.first_connection()
 
         trades = []
-        # first get all orders, to see which product ids we need to query fills for
-        orders = []
-        for batch in self._paginated_query(
-            endpoint='orders',
-            query_options={'status': 'done'},
-        ):
-            orders.extend(batch)
-
-        queried_product_ids = set()
-
+        # first get all orders, to see which product ids we need to query fills for.
+        # Open orders are included since they can have been partially filled in the range
+        orders = itertools.chain.from_iterable(itertools.chain(
+            self._paginated_query(endpoint='orders', query_options={'status': 'done'}),
+            self._paginated_query(endpoint='orders', query_options={'status': 'open'}),
+        ))
+        queried_product_ids: dict[str, None] = {}  # used as an insertion ordered set
         for order_entry in orders:
             product_id = order_entry.get('product_id', None)
             if product_id is None:
@@ -527,17 +759,25 @@ class Coinbasepro(ExchangeInterface):
             if product_id in queried_product_ids or product_id not in self.available_products:
                 continue  # already queried this product id or delisted product id
 
-            # Now let's get all fills for this product id
-            queried_product_ids.add(product_id)
-            fills = []
-            for batch in self._paginated_query(
-                    endpoint='fills',
-                    query_options={'product_id': product_id},
-            ):
-                fills.extend(batch)
+            if not _order_may_have_fills_in_range(order_entry, start_ts, end_ts):
+                continue
 
+            queried_product_ids[product_id] = None
+
+        # Now let's get the fills for each product id concurrently. Fills come newest first
+        # and older trades are already saved in the DB, so stop once we are past start_ts
+        fills_results = _run_concurrently([functools.partial(
+            self._query_all_pages,
+            endpoint='fills',
+            query_options={'product_id': product_id},
+            stop_predicate=lambda batch: _batch_created_before(batch, start_ts),
+        ) for product_id in queried_product_ids])
+        for product_id, fill_pages in zip(queried_product_ids, fills_results):
             try:
-                base_asset, quote_asset = coinbasepro_to_worldpair(product_id)
+                base_asset, quote_asset = self.product_assets.get(product_id) or coinbasepro_to_worldpair(  # noqa: E501
+                    product=product_id,
+                    asset_getter=self._asset_from_coinbasepro,
+                )
             except UnprocessableTradePair as e:
                 self.msg_aggregator.add_warning(
                     f'Found unprocessable Coinbasepro pair {e.pair}. Ignoring the trade.',
@@ -550,7 +790,7 @@ class Coinbasepro(ExchangeInterface):
                 )
                 continue
 
-            for fill_entry in fills:
+            for fill_entry in itertools.chain.from_iterable(fill_pages):
                 try:
                     timestamp = coinbasepro_deserialize_timestamp(fill_entry, 'created_at')
                     if timestamp < start_ts or timestamp > end_ts:
@@ -7,6 +7,11 @@ from rotkehlchen.errors.serialization import ConversionError
 AcceptableFValInitInput = Union[float, bytes, Decimal, int, str, 'FVal']
 AcceptableFValOtherInput = Union[int, 'FVal']
 
+# Results of Decimal.compare_signal(). Created once instead of at every comparison
+_DECIMAL_MINUS_ONE = Decimal('-1')
+_DECIMAL_ZERO = Decimal('0')
+_DECIMAL_ONE = Decimal('1')
+
 
 class FVal:
     """A value to represent numbers for financial applications. At the moment
@@ -23,7 +28,11 @@ class FVal:
     def __init__(self, data: AcceptableFValInitInput = 0):
 
         try:
-            if isinstance(data, float):
+            if type(data) is Decimal:  # result of arithmetic. Decimals are immutable so no copy
+                self.num = data
+            elif type(data) is str:  # most common input when deserializing external data
+                self.num = Decimal(data)
+            elif isinstance(data, float):
                 self.num = Decimal(str(data))
             elif isinstance(data, bytes):
                 # assume it's an ascii string and try to decode the bytes to one
@@ -56,19 +65,19 @@ class FVal:
 
     def __gt__(self, other: AcceptableFValOtherInput) -> bool:
         evaluated_other = _evaluate_input(other)
-        return self.num.compare_signal(evaluated_other) == Decimal('1')
+        return self.num.compare_signal(evaluated_other) == _DECIMAL_ONE
 
     def __lt__(self, other: AcceptableFValOtherInput) -> bool:
         evaluated_other = _evaluate_input(other)
-        return self.num.compare_signal(evaluated_other) == Decimal('-1')
+        return self.num.compare_signal(evaluated_other) == _DECIMAL_MINUS_ONE
 
     def __le__(self, other: AcceptableFValOtherInput) -> bool:
         evaluated_other = _evaluate_input(other)
-        return self.num.compare_signal(evaluated_other) in (Decimal('-1'), Decimal('0'))
+        return self.num.compare_signal(evaluated_other) in (_DECIMAL_MINUS_ONE, _DECIMAL_ZERO)
 
     def __ge__(self, other: AcceptableFValOtherInput) -> bool:
         evaluated_other = _evaluate_input(other)
-        return self.num.compare_signal(evaluated_other) in (Decimal('1'), Decimal('0'))
+        return self.num.compare_signal(evaluated_other) in (_DECIMAL_ONE, _DECIMAL_ZERO)
 
     def __eq__(self, other: object) -> bool:
         evaluated_other: Union[Decimal, int]
@@ -79,7 +88,7 @@ class FVal:
         else:
             evaluated_other = other
 
-        return self.num.compare_signal(evaluated_other) == Decimal('0')
+        return self.num.compare_signal(evaluated_other) == _DECIMAL_ZERO
 
     def __add__(self, other: AcceptableFValOtherInput) -> 'FVal':
         evaluated_other = _evaluate_input(other)
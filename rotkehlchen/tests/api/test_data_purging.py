@@ -1,5 +1,8 @@
+from unittest.mock import patch
+
 import pytest
 import requests
+from pysqlcipher3 import dbapi2 as sqlcipher
 
 from rotkehlchen.chain.accounts import BlockchainAccountData
 from rotkehlchen.constants import ONE
@@ -96,3 +99,71 @@ def test_purge_ethereum_transaction_data(rotkehlchen_api_server):
         result, filter_count = db.get_evm_transactions_and_limit_info(cursor, filter_, True)
     assert len(result) == 0
     assert filter_count == 0
+
+
+@pytest.mark.parametrize('vacuum_fails', [False, True])
+def test_purge_ethereum_transaction_data_with_vacuum(rotkehlchen_api_server, vacuum_fails):
+    """Test that the vacuum argument of the purge endpoint vacuums the DB and that
+    a failing vacuum does not fail the purge but only warns the user"""
+    rotki = rotkehlchen_api_server.rest_api.rotkehlchen
+    conn = rotki.data.db.conn
+    addr1 = make_evm_address()
+    db = DBEvmTx(rotki.data.db)
+    with rotki.data.db.user_write() as write_cursor:
+        rotki.data.db.add_blockchain_accounts(
+            write_cursor=write_cursor,
+            account_data=[
+                BlockchainAccountData(chain=SupportedBlockchain.ETHEREUM, address=addr1),
+            ],
+        )
+        db.add_evm_transactions(
+            write_cursor,
+            [EvmTransaction(
+                tx_hash=make_evm_tx_hash(),
+                chain_id=ChainID.ETHEREUM,
+                timestamp=1,
+                block_number=1,
+                from_address=addr1,
+                to_address=make_evm_address(),
+                value=ONE,
+                gas=ONE,
+                gas_price=ONE,
+                gas_used=ONE,
+                input_data=bytes(2048),
+                nonce=idx,
+            ) for idx in range(200)],
+            relevant_address=addr1,
+        )
+
+    original_execute = conn.execute
+
+    def mock_execute(statement, *args, **kwargs):
+        if vacuum_fails is True and statement == 'VACUUM;':
+            raise sqlcipher.OperationalError('cannot VACUUM - SQL statements in progress')  # pylint: disable=no-member
+        return original_execute(statement, *args, **kwargs)
+
+    with patch.object(conn, 'execute', side_effect=mock_execute):
+        response = requests.delete(
+            api_url_for(
+                rotkehlchen_api_server,
+                'evmtransactionsresource',
+            ),
+            json={'evm_chain': 'ethereum', 'vacuum': True},
+        )
+    assert_simple_ok_response(response)
+
+    filter_ = EvmTransactionsFilterQuery.make(chain_id=ChainID.ETHEREUM)
+    with conn.read_ctx() as cursor:
+        result, filter_count = db.get_evm_transactions_and_limit_info(cursor, filter_, True)
+        assert len(result) == 0
+        assert filter_count == 0
+        free_pages = cursor.execute('PRAGMA freelist_count').fetchone()[0]
+
+    warnings = rotki.msg_aggregator.consume_warnings()
+    if vacuum_fails is True:
+        assert free_pages > 0
+        assert len(warnings) == 1
+        assert 'could not reclaim the freed space' in warnings[0]
+    else:
+        assert free_pages == 0
+        assert len(warnings) == 0
@@ -1891,6 +1891,7 @@ def test_upgrade_db_39_to_40(user_data_dir):  # pylint: disable=unused-argument
     assert table_exists(cursor, 'accounting_rules') is True
     assert table_exists(cursor, 'ledger_action_type') is False
     assert table_exists(cursor, 'ledger_actions') is False
+    assert table_exists(cursor, 'sqlite_stat1') is True  # statistics were gathered
 
     assert cursor.execute(  # Check that BASE and GNOSIS locations were added
         'SELECT location FROM location WHERE seq IN (?, ?) ORDER BY seq',
@@ -1993,7 +1994,8 @@ def test_latest_upgrade_correctness(user_data_dir):
     assert missing_views == removed_views
     assert tables_after_creation - tables_after_upgrade == set()
     assert views_after_creation - views_after_upgrade == set()
-    new_tables = tables_after_upgrade - tables_before
+    # sqlite_stat1 holds the query planner statistics gathered by ANALYZE
+    new_tables = tables_after_upgrade - tables_before - {'sqlite_stat1'}
     assert new_tables == {
         'skipped_external_events',
         'accounting_rules',
@@ -10,6 +10,11 @@ from rotkehlchen.tests.utils.constants import (
     ETH_ADDRESS3,
     MOCK_INPUT_DATA,
 )
+from rotkehlchen.tests.utils.ethereum import (
+    TEST_ADDR1,
+    setup_ethereum_transactions_test,
+    txreceipt_to_data,
+)
 from rotkehlchen.tests.utils.factories import make_evm_address, make_evm_tx_hash
 from rotkehlchen.types import (
     ChainID,
@@ -307,3 +312,83 @@ def test_query_also_internal_evm_transactions(data_dir, username, sql_vm_instruc
             has_premium=True,
         )
         assert result == [tx1, tx3, tx4]
+
+
+def test_add_multiple_receipts(database):
+    """Test that adding multiple receipts in one go stores all logs and topics correctly"""
+    dbevmtx = DBEvmTx(database)
+    transactions, receipts = setup_ethereum_transactions_test(
+        database=database,
+        transaction_already_queried=True,
+    )
+    with database.user_write() as write_cursor:
+        dbevmtx.add_multiple_receipt_data(
+            write_cursor=write_cursor,
+            chain_id=ChainID.ETHEREUM,
+            data_list=[txreceipt_to_data(x) for x in receipts],
+        )
+
+    with database.conn.read_ctx() as cursor:
+        for transaction, receipt in zip(transactions, receipts, strict=True):
+            assert dbevmtx.get_receipt(cursor, transaction.tx_hash, ChainID.ETHEREUM) == receipt
+
+
+def test_purge_evm_transaction_data_with_vacuum(database):
+    """Test that purging transactions only reclaims the freed pages if vacuum is given"""
+    dbevmtx = DBEvmTx(database)
+
+    def add_transactions() -> None:
+        """Add enough transactions with big input data to span many pages"""
+        with database.user_write() as write_cursor:
+            write_cursor.executemany(
+                'INSERT INTO evm_transactions(tx_hash, chain_id, timestamp, block_number, '
+                'from_address, to_address, value, gas, gas_price, gas_used, input_data, nonce) '
+                'VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                [(
+                    idx.to_bytes(32, 'big'), ChainID.ETHEREUM.serialize_for_db(), 1, 1,
+                    TEST_ADDR1, TEST_ADDR1, '0', '1', '1', '1', b'\x01' * 2048, idx,
+                ) for idx in range(200)],
+            )
+
+    def count_transactions_and_free_pages() -> tuple[int, int]:
+        with database.conn.read_ctx() as cursor:
+            return (
+                cursor.execute('SELECT COUNT(*) FROM evm_transactions').fetchone()[0],
+                cursor.execute('PRAGMA freelist_count').fetchone()[0],
+            )
+
+    add_transactions()
+    dbevmtx.purge_evm_transaction_data(chain=SupportedBlockchain.ETHEREUM)
+    transactions_num, free_pages = count_transactions_and_free_pages()
+    assert transactions_num == 0
+    assert free_pages > 0  # deleting without vacuum leaves the freed pages in the file
+
+    add_transactions()
+    dbevmtx.purge_evm_transaction_data(chain=SupportedBlockchain.ETHEREUM, vacuum=True)
+    assert count_transactions_and_free_pages() == (0, 0)
+
+
+def test_add_evm_transactions_and_receipts(database):
+    """Test that transactions and their receipts can be added together in one go"""
+    dbevmtx = DBEvmTx(database)
+    transactions, receipts = setup_ethereum_transactions_test(
+        database=database,
+        transaction_already_queried=False,
+    )
+    with database.user_write() as write_cursor:
+        dbevmtx.add_evm_transactions_and_receipts(
+            write_cursor=write_cursor,
+            chain_id=ChainID.ETHEREUM,
+            evm_transactions=transactions,
+            receipts_data=[txreceipt_to_data(x) for x in receipts],
+            relevant_address=TEST_ADDR1,
+        )
+
+    with database.conn.read_ctx() as cursor:
+        assert dbevmtx.get_evm_transactions(
+            cursor=cursor,
+            filter_=EvmTransactionsFilterQuery.make(chain_id=ChainID.ETHEREUM),
+            has_premium=True,
+        ) == transactions
+        for transaction, receipt in zip(transactions, receipts, strict=True):
+            assert dbevmtx.get_receipt(cursor, transaction.tx_hash, ChainID.ETHEREUM) == receipt
@@ -10,15 +10,27 @@ TODO: Make some mock tests at some point
 
 import warnings as test_warnings
 from enum import Enum
-from typing import Literal
+from typing import Literal, Optional
 from unittest.mock import patch
 
+import gevent
+import pytest
+
 from rotkehlchen.constants.assets import A_BAT, A_ETH
-from rotkehlchen.errors.asset import UnknownAsset
-from rotkehlchen.exchanges.coinbasepro import Coinbasepro, coinbasepro_to_worldpair
+from rotkehlchen.db.settings import CachedSettings
+from rotkehlchen.errors.asset import UnknownAsset, UnsupportedAsset
+from rotkehlchen.errors.misc import RemoteError
+from rotkehlchen.exchanges.coinbasepro import (
+    Coinbasepro,
+    _order_may_have_fills_in_range,
+    _run_concurrently,
+    _transfers_batch_past_range,
+    coinbasepro_to_worldpair,
+)
 from rotkehlchen.fval import FVal
+from rotkehlchen.inquirer import Inquirer
 from rotkehlchen.tests.utils.mock import MockResponse
-from rotkehlchen.types import Location
+from rotkehlchen.types import ApiSecret, ExchangeAuthCredentials, Location, Timestamp
 
 PRODUCTS_RESPONSE = """[{
 "id": "BAT-ETH",
@@ -93,6 +105,7 @@ def create_coinbasepro_query_mock(
             url: str,
             timeout: int,  # pylint: disable=unused-argument
             data: str = '',  # pylint: disable=unused-argument
+            headers: Optional[dict[str, str]] = None,  # pylint: disable=unused-argument
             allow_redirects: bool = True,  # pylint: disable=unused-argument
     ) -> MockResponse:
         if 'products' in url:
@@ -121,6 +134,21 @@ def test_name():
     assert exchange.name == 'coinbasepro1'
 
 
+def test_secret_decoding():
+    """Test that the API secret is decoded once and re-decoded when edited"""
+    exchange = Coinbasepro('coinbasepro1', 'a', b'a', object(), object(), '')
+    assert exchange.secret_key is None
+    with pytest.raises(RemoteError, match='Provided API Secret is invalid'):
+        exchange._api_query('accounts')
+
+    exchange.edit_exchange_credentials(ExchangeAuthCredentials(
+        api_key=None,
+        api_secret=ApiSecret(b'YWJj'),
+        passphrase=None,
+    ))
+    assert exchange.secret_key == b'abc'
+
+
 def test_coverage_of_products():
     """Test that we can process all pairs and assets of the offered coinbasepro products"""
     exchange = Coinbasepro('coinbasepro1', 'a', b'a', object(), object(), '')
@@ -212,3 +240,173 @@ def test_query_balances_keyerror_response(function_scope_coinbasepro):
     errors = cb.msg_aggregator.consume_errors()
     assert len(errors) == 1
     assert 'Error processing a coinbase pro account balance' in errors[0]
+
+
+def test_query_balances_price_error(function_scope_coinbasepro):
+    """Test that an error querying the price of one asset only skips that asset"""
+    cb = function_scope_coinbasepro
+
+    def mock_find_usd_price(asset):
+        if asset == A_BAT:
+            raise UnsupportedAsset(asset.identifier)
+        return FVal('1.5')
+
+    with (
+        create_coinbasepro_query_mock(cb),
+        patch.object(Inquirer, 'find_usd_price', side_effect=mock_find_usd_price),
+    ):
+        balances, message = cb.query_balances()
+
+    assert message == ''
+    assert len(balances) == 1
+    assert balances[A_ETH].amount == FVal('2.5')
+    assert balances[A_ETH].usd_value == FVal('3.75')
+
+    warnings = cb.msg_aggregator.consume_warnings()
+    assert len(warnings) == 1
+    assert 'Found coinbase pro balance result with unsupported asset' in warnings[0]
+    errors = cb.msg_aggregator.consume_errors()
+    assert len(errors) == 0
+
+
+def test_paginated_query_stop_predicate():
+    """Test that pagination stops at the first page for which the stop predicate holds"""
+    exchange = Coinbasepro('coinbasepro1', 'a', b'a', object(), object(), '')
+    pages = [
+        [{'created_at': '2021-03-10 10:00:00.000000+00'}] * 2,
+        [{'created_at': '2021-02-10 10:00:00.000000+00'}] * 2,
+        [{'created_at': '2021-01-10 10:00:00.000000+00'}] * 2,
+    ]
+    api_query_mock = patch.object(
+        exchange,
+        '_api_query',
+        side_effect=[(page, 'cursor') for page in pages],
+    )
+    with api_query_mock as mocked_query:
+        batches = list(exchange._paginated_query(
+            endpoint='transfers',
+            limit=2,
+            stop_predicate=lambda batch: batch[-1]['created_at'].startswith('2021-02'),
+        ))
+
+    assert batches == pages[:2]
+    assert mocked_query.call_count == 2
+
+
+def test_accounts_etag_caching(function_scope_coinbasepro):
+    """Test that a 304 response to the conditional accounts query reuses the cached accounts"""
+    cb = function_scope_coinbasepro
+    sent_headers = []
+
+    def mock_request(request_method, url, data, headers, timeout):  # pylint: disable=unused-argument
+        assert 'accounts' in url
+        sent_headers.append(headers)
+        if len(sent_headers) == 1:
+            return MockResponse(200, ACCOUNTS_RESPONSE, headers={'ETag': 'W/"1"'})
+        return MockResponse(304, '')
+
+    with patch.object(cb.session, 'request', side_effect=mock_request):
+        account_to_currency = cb.create_or_return_account_to_currency_map()
+        balances, message = cb.query_balances()
+
+    assert account_to_currency == {BAT_ACCOUNT_ID: A_BAT, ETH_ACCOUNT_ID: A_ETH}
+    assert message == ''
+    assert balances[A_BAT].amount == FVal('10.5')
+    assert balances[A_ETH].amount == FVal('2.5')
+    assert 'If-None-Match' not in sent_headers[0]
+    assert sent_headers[1]['If-None-Match'] == 'W/"1"'
+
+
+def test_rate_limit_retry_after():
+    """Test that the Retry-After header of a 429 response is respected when backing off"""
+    exchange = Coinbasepro('coinbasepro1', 'a', b'a', object(), object(), '')
+    responses = [
+        MockResponse(429, '', headers={'Retry-After': '3'}),
+        MockResponse(200, PRODUCTS_RESPONSE),
+    ]
+    with (
+        patch.object(exchange.session, 'request', side_effect=responses),
+        patch('rotkehlchen.exchanges.coinbasepro.gevent.sleep') as sleep_mock,
+    ):
+        products, _ = exchange._api_query('products')
+
+    assert products[0]['id'] == 'BAT-ETH'
+    sleep_mock.assert_called_once_with(3.0)
+
+    # out of bounds or invalid values are clamped or fall back to the incremental backoff
+    responses = [
+        MockResponse(429, '', headers={'Retry-After': '100000'}),
+        MockResponse(429, '', headers={'Retry-After': '-5'}),
+        MockResponse(429, '', headers={'Retry-After': 'nan'}),
+        MockResponse(200, PRODUCTS_RESPONSE),
+    ]
+    with (
+        patch.object(exchange.session, 'request', side_effect=responses),
+        patch('rotkehlchen.exchanges.coinbasepro.gevent.sleep') as sleep_mock,
+        patch.object(CachedSettings(), 'get_query_retry_limit', return_value=5),
+    ):
+        exchange._api_query('products')
+
+    assert [x.args[0] for x in sleep_mock.call_args_list] == [5, 0, 5 / 3]
+
+
+def test_order_may_have_fills_in_range():
+    """Test that only orders that can't have fills in the queried range are filtered out"""
+    start_ts, end_ts = Timestamp(1612137600), Timestamp(1614556800)  # 1/2/2021 - 1/3/2021
+    order = {'created_at': '2021-01-15T10:00:00.000000Z', 'done_at': '2021-02-15T10:00:00.000000Z'}
+    assert _order_may_have_fills_in_range(order, start_ts, end_ts) is True
+    order['done_at'] = '2021-01-20T10:00:00.000000Z'  # done before the range
+    assert _order_may_have_fills_in_range(order, start_ts, end_ts) is False
+    order['created_at'] = '2021-03-15T10:00:00.000000Z'  # created after the range
+    assert _order_may_have_fills_in_range(order, start_ts, end_ts) is False
+    # still open orders created before the range end may have been partially filled in it
+    order = {'created_at': '2021-01-15T10:00:00.000000Z', 'done_at': None}
+    assert _order_may_have_fills_in_range(order, start_ts, end_ts) is True
+    # if the timestamps can't be read the order is kept
+    assert _order_may_have_fills_in_range({'created_at': None}, start_ts, end_ts) is True
+    assert _order_may_have_fills_in_range({}, start_ts, end_ts) is True
+
+
+def test_transfers_batch_past_range():
+    """Test that transfer pagination goes on for transfers that may complete in range"""
+    start_ts = Timestamp(1614556800)  # 1/3/2021
+    # created just before the range. Could still be pending and complete in range later
+    batch = [{'created_at': '2021-02-25T10:00:00.000000Z', 'completed_at': '2021-02-25T11:00:00.000000Z'}]  # noqa: E501
+    assert _transfers_batch_past_range(batch, start_ts) is False
+    # created well before the range and completed before it
+    batch = [{'created_at': '2021-01-10T10:00:00.000000Z', 'completed_at': '2021-01-10T11:00:00.000000Z'}]  # noqa: E501
+    assert _transfers_batch_past_range(batch, start_ts) is True
+    # created well before the range but completed in it, so older ones may have too
+    batch[0]['completed_at'] = '2021-03-02T10:00:00.000000Z'
+    assert _transfers_batch_past_range(batch, start_ts) is False
+
+
+def test_run_concurrently():
+    """Test that concurrent queries return in order and that an error stops the others"""
+    assert _run_concurrently([lambda: 1, lambda: 2, lambda: 3]) == [1, 2, 3]
+
+    finished = []
+
+    def failing_query():
+        raise RemoteError('boom')
+
+    def slow_query():
+        gevent.sleep(5)
+        finished.append(True)
+
+    with pytest.raises(RemoteError, match='boom'):
+        _run_concurrently([failing_query, slow_query])
+
+    gevent.sleep(0.1)
+    assert finished == []  # the slow query got killed
+
+
+def test_first_connection_resolves_product_assets(function_scope_coinbasepro):
+    """Test that the assets of the available products are resolved once at first connection"""
+    cb = function_scope_coinbasepro
+    with create_coinbasepro_query_mock(cb):
+        cb.first_connection()
+
+    assert cb.available_products == {'BAT-ETH'}
+    assert cb.product_assets == {'BAT-ETH': (A_BAT, A_ETH)}
+    assert cb.asset_cache == {'BAT': A_BAT, 'ETH': A_ETH}
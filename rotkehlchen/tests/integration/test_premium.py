@@ -551,8 +551,9 @@ def test_upload_data_to_server_db_locked(rotkehlchen_instance):
         the plaintext DB is not attached. Which is also the fix. To make that
         export occur under a critical section
         """
-        result = db.conn.execute('SELECT * FROM pragma_database_list;')
-        assert len(result.fetchall()) == 1, 'the plaintext DB should not be attached here'
+        result = db.conn.execute('SELECT name FROM pragma_database_list;')
+        attached = {entry[0] for entry in result}
+        assert 'plaintext' not in attached, 'the plaintext DB should not be attached here'
 
     with db.user_write() as cursor:
         last_ts = rotkehlchen_instance.data.db.get_setting(cursor, name='last_data_upload_ts')
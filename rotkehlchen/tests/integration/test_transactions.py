@@ -1,4 +1,5 @@
 from typing import TYPE_CHECKING
+from unittest.mock import patch
 
 import pytest
 
@@ -16,6 +17,7 @@ from rotkehlchen.tests.utils.ethereum import (
     TEST_ADDR1,
     TEST_ADDR2,
     setup_ethereum_transactions_test,
+    txreceipt_to_data,
 )
 from rotkehlchen.types import ChainID, EvmTransaction, Timestamp, deserialize_evm_tx_hash
 from rotkehlchen.user_messages import MessagesAggregator
@@ -55,6 +57,40 @@ def test_get_transaction_receipt(
     assert results[0] == transactions[0]
 
 
+@pytest.mark.parametrize('ethereum_accounts', [[TEST_ADDR1, TEST_ADDR2]])
+def test_get_receipts_for_transactions_missing_them(
+        database: 'DBHandler',
+        eth_transactions: 'EthereumTransactions',
+) -> None:
+    """Test that the receipts of multiple transactions are queried and written in one batch
+    and that a receipt added in the meantime by another greenlet does not abort the batch"""
+    transactions, receipts = setup_ethereum_transactions_test(
+        database=database,
+        transaction_already_queried=True,
+    )
+    dbevmtx = DBEvmTx(database)
+    receipts_data = {x.tx_hash: txreceipt_to_data(x) for x in receipts}
+
+    def mock_get_transaction_receipt(tx_hash):
+        if tx_hash == transactions[1].tx_hash:  # simulate another greenlet adding the first one
+            with database.user_write() as write_cursor:
+                dbevmtx.add_receipt_data(write_cursor, ChainID.ETHEREUM, receipts_data[transactions[0].tx_hash])  # noqa: E501
+        return receipts_data[tx_hash]
+
+    with patch.object(
+        eth_transactions.evm_inquirer,
+        'get_transaction_receipt',
+        side_effect=mock_get_transaction_receipt,
+    ) as receipt_mock:
+        eth_transactions.get_receipts_for_transactions_missing_them()
+
+    assert receipt_mock.call_count == 2
+    assert dbevmtx.get_transaction_hashes_no_receipt(tx_filter_query=None, limit=None) == []
+    with database.conn.read_ctx() as cursor:
+        for transaction, receipt in zip(transactions, receipts):
+            assert dbevmtx.get_receipt(cursor, transaction.tx_hash, ChainID.ETHEREUM) == receipt
+
+
 @pytest.mark.vcr()
 @pytest.mark.parametrize('ethereum_manager_connect_at_start', [(INFURA_ETH_NODE,)])
 @pytest.mark.parametrize('ethereum_accounts', [[ETH_ADDRESS1, ETH_ADDRESS2, ETH_ADDRESS3]])
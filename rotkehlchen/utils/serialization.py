@@ -42,16 +42,22 @@ class RKLEncoder(json.JSONEncoder):
         return super().encode(self._encode(obj))
 
 
-def jsonloads_dict(data: str) -> dict[str, Any]:
-    """Just like jsonloads but forces the result to be a Dict"""
+def jsonloads_dict(data: Union[str, bytes]) -> dict[str, Any]:
+    """Just like jsonloads but forces the result to be a Dict
+
+    Accepts bytes as well so that raw response bodies can be parsed without decoding them first
+    """
     value = json.loads(data)
     if not isinstance(value, dict):
         raise JSONDecodeError(msg='Returned json is not a dict', doc='{}', pos=0)
     return value
 
 
-def jsonloads_list(data: str) -> list:
-    """Just like jsonloads but forces the result to be a List"""
+def jsonloads_list(data: Union[str, bytes]) -> list:
+    """Just like jsonloads but forces the result to be a List
+
+    Accepts bytes as well so that raw response bodies can be parsed without decoding them first
+    """
     value = json.loads(data)
     if not isinstance(value, list):
         raise JSONDecodeError(msg='Returned json is not a list', doc='{}', pos=0)